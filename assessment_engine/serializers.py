@@ -0,0 +1,34 @@
+import copy
+
+from rest_framework import serializers
+
+
+class CachedFieldsMixin:
+    """Build a serializer class's fields once and hand each instance copies of them.
+
+    ModelSerializer.get_fields() introspects the model and deep-copies every declared
+    field each time a serializer is instantiated. The first result is kept per class;
+    plain fields are shallow-copied per instance. Nested serializers and composite
+    fields (ListField/DictField `child`, ManyRelatedField `child_relation`) are
+    deep-copied, so the children they bind stay private to the instance that binds them.
+    """
+
+    def get_fields(self):
+        cls = type(self)
+        cached = cls.__dict__.get("_cached_fields")
+        if cached is None:
+            cached = super().get_fields()
+            cls._cached_fields = cached
+        return {
+            name: copy.deepcopy(field) if _has_children(field) else copy.copy(field)
+            for name, field in cached.items()
+        }
+
+
+def _has_children(field):
+    """Whether binding `field` also binds fields it holds, which a shallow copy would share."""
+    return (
+        isinstance(field, serializers.BaseSerializer)
+        or hasattr(field, "child")
+        or hasattr(field, "child_relation")
+    )
@@ -105,6 +105,10 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # Keep connections open between requests instead of reconnecting each time.
+        # Set DB_CONN_MAX_AGE=0 when running behind a transaction-pooling proxy (pgbouncer).
+        "CONN_MAX_AGE": int(os.getenv("DB_CONN_MAX_AGE", "60")),
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
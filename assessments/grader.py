@@ -3,10 +3,27 @@
 Enhanced grading module with LLM integration.
 Supports multiple grading strategies: mock, LLM-based, or hybrid.
 """
-from typing import Tuple, Optional, Dict, Any
+from typing import Tuple, Optional, Dict, Any, List, TypedDict, Callable
 from abc import ABC, abstractmethod
+import asyncio
+import concurrent.futures
+import hashlib
+import json
 import os
+import re
+import threading
+from collections import OrderedDict
 from enum import Enum
+from functools import lru_cache
+
+# Matches "SCORE: ..." lines and the "FEEDBACK: ..." block of a single-answer grading reply
+_LLM_RESPONSE_RE = re.compile(r"^(?:SCORE:(?P<score>[^\n]*)|FEEDBACK:(?P<feedback>.*))", re.MULTILINE | re.DOTALL)
+
+class _BatchGrade(TypedDict):
+    """One entry of Gemini's JSON reply to a batched grading prompt."""
+    id: int
+    score: float
+    feedback: str
 
 class GradingStrategy(Enum):
     """Available grading strategies."""
@@ -22,11 +39,28 @@ class BaseGrader(ABC):
         """Return (points_awarded, points_possible, feedback)."""
         pass
     
+    def grade_mcq_batch(self, expected_keys: List[Any], selected_keys: List[Any],
+                        points: List[float]) -> List[Tuple[float, float, Optional[str]]]:
+        """Grade many MCQ answers at once. Returns one result tuple per answer."""
+        return [self.grade_mcq(e, s, p) for e, s, p in zip(expected_keys, selected_keys, points)]
+    
     @abstractmethod
     def grade_text(self, question_text: str, expected_answer: Any, student_answer: str, 
                    points: float) -> Tuple[float, float, Optional[str]]:
         """Return (points_awarded, points_possible, feedback)."""
         pass
+    
+    def grade_text_batch(self, items: List[Tuple[str, Any, str, float]]) -> List[Tuple[float, float, Optional[str]]]:
+        """
+        Grade many text answers at once.
+        
+        Args:
+            items: List of (question_text, expected_answer, student_answer, points) tuples
+        
+        Returns:
+            One (points_awarded, points_possible, feedback) tuple per item, in order
+        """
+        return [self.grade_text(*item) for item in items]
 
 
 class MockGrader(BaseGrader):
@@ -49,19 +83,15 @@ class MockGrader(BaseGrader):
         if not expected_answer:
             return 0.0, points, "No expected answer provided."
         
-        # Parse keywords
-        if isinstance(expected_answer, str):
-            keywords = [k.strip().lower() for k in expected_answer.split(",") if k.strip()]
-        else:
-            keywords = [str(k).strip().lower() for k in expected_answer]
-        
+        keywords = _parse_keywords(expected_answer)
         answer = (student_answer or "").lower()
         
         if not keywords:
             return 0.0, points, "No keywords to match."
         
-        # Calculate keyword matches
-        matched = sum(1 for kw in keywords if kw and kw in answer)
+        # Calculate keyword matches; each keyword is one C-level substring search
+        # (empty keywords would always match, so they are skipped)
+        matched = sum(map(answer.__contains__, filter(None, keywords)))
         ratio = matched / len(keywords)
         awarded = round(ratio * points, 4)
         
@@ -70,9 +100,52 @@ class MockGrader(BaseGrader):
         return awarded, points, feedback
     
 
+def _parse_keywords(expected_answer: Any) -> Tuple[str, ...]:
+    """Normalize a comma-separated string or list of keywords to lowercase."""
+    if isinstance(expected_answer, str):
+        return _parse_keyword_string(expected_answer)
+    # JSON lists are not cached: lru_cache matches keys by equality, so [1], [True]
+    # and [1.0] would share an entry even though str() renders them differently
+    return tuple(str(k).strip().lower() for k in expected_answer)
+
+
+@lru_cache(maxsize=1024)
+def _parse_keyword_string(expected_answer: str) -> Tuple[str, ...]:
+    """Split a comma-separated keyword string once per distinct string."""
+    return tuple(k.strip().lower() for k in expected_answer.split(",") if k.strip())
+
+
+# API key genai was last configured with; genai.configure() sets process-wide state
+_genai_api_key: Optional[str] = None
+_genai_lock = threading.Lock()
+
+
+def _configure_genai(genai: Any, api_key: str) -> None:
+    """Configure the genai client once per API key rather than once per grader."""
+    global _genai_api_key
+    with _genai_lock:
+        if _genai_api_key != api_key:
+            genai.configure(api_key=api_key)
+            _genai_api_key = api_key
+
+
 class GeminiGrader(BaseGrader):
     """LLM-based grading using Google Gemini API."""
     
+    # Maximum number of graded (question, expected, answer, points) results kept in memory
+    CACHE_SIZE = 10_000
+    # Maximum number of Gemini requests in flight for one batch
+    MAX_CONCURRENCY = 10
+    # Seconds a request thread waits for the batched request, or for the concurrent
+    # per-answer fallback before keyword-grading it instead
+    BATCH_TIMEOUT = 60
+    # Output token limit of the Gemini 2.5 models; a batched reply is never asked for more
+    MAX_OUTPUT_TOKENS = 65_536
+    GENERATION_CONFIG = {
+        "temperature": 0.3,
+        "max_output_tokens": 500,
+    }
+    
     def __init__(self, api_key: Optional[str] = None, model: str = "gemini-2.5-flash"):
         """
         Initialize Gemini grader.
@@ -90,33 +163,44 @@ class GeminiGrader(BaseGrader):
         if not self.api_key:
             raise ValueError("Google API key not provided")
         
-        genai.configure(api_key=self.api_key)
+        _configure_genai(genai, self.api_key)
         self.model = genai.GenerativeModel(model)
+        self._cache: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
     
     def grade_mcq(self, expected_key: str, selected_key: str, points: float) -> Tuple[float, float, Optional[str]]:
         """MCQ grading (uses simple matching)."""
         mock_grader = MockGrader()
         return mock_grader.grade_mcq(expected_key, selected_key, points)
     
+    def grade_mcq_batch(self, expected_keys: List[Any], selected_keys: List[Any],
+                        points: List[float]) -> List[Tuple[float, float, Optional[str]]]:
+        """MCQ batch grading (uses simple matching)."""
+        mock_grader = MockGrader()
+        return mock_grader.grade_mcq_batch(expected_keys, selected_keys, points)
+    
     def grade_text(self, question_text: str, expected_answer: Any, student_answer: str, 
                    points: float) -> Tuple[float, float, Optional[str]]:
         """Gemini-based text grading."""
         if not student_answer or not student_answer.strip():
             return 0.0, points, "No answer provided."
         
+        cache_key = self._cache_key(question_text, expected_answer, student_answer, points)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            score, feedback = cached
+            return score, points, feedback
+        
         try:
             prompt = self._build_grading_prompt(question_text, expected_answer, student_answer, points)
             
-            response = self.model.generate_content(
-                prompt,
-                generation_config={
-                    "temperature": 0.3,
-                    "max_output_tokens": 500,
-                }
-            )
+            response = self.model.generate_content(prompt, generation_config=self.GENERATION_CONFIG)
             
             result = response.text
             score, feedback = self._parse_llm_response(result, points)
+            self._cache_set(cache_key, (score, feedback))
             
             return score, points, feedback
             
@@ -125,6 +209,156 @@ class GeminiGrader(BaseGrader):
             mock_grader = MockGrader()
             return mock_grader.grade_text(question_text, expected_answer, student_answer, points)
     
+    async def grade_text_async(self, question_text: str, expected_answer: Any, student_answer: str,
+                               points: float) -> Tuple[float, float, Optional[str]]:
+        """Gemini-based text grading that does not block the event loop."""
+        if not student_answer or not student_answer.strip():
+            return 0.0, points, "No answer provided."
+        
+        cache_key = self._cache_key(question_text, expected_answer, student_answer, points)
+        cached = self._cache_get(cache_key)
+        if cached is not None:
+            score, feedback = cached
+            return score, points, feedback
+        
+        try:
+            prompt = self._build_grading_prompt(question_text, expected_answer, student_answer, points)
+            
+            response = await self.model.generate_content_async(prompt, generation_config=self.GENERATION_CONFIG)
+            
+            score, feedback = self._parse_llm_response(response.text, points)
+            self._cache_set(cache_key, (score, feedback))
+            
+            return score, points, feedback
+            
+        except Exception as e:
+            print(f"Gemini grading failed: {e}. Falling back to keyword matching.")
+            mock_grader = MockGrader()
+            return mock_grader.grade_text(question_text, expected_answer, student_answer, points)
+    
+    def grade_text_batch(self, items: List[Tuple[str, Any, str, float]]) -> List[Tuple[float, float, Optional[str]]]:
+        """
+        Grade text answers with a single Gemini request.
+        
+        Blank and cached answers are resolved locally. If the batched reply
+        cannot be parsed, the remaining answers are graded with one concurrent
+        request each.
+        """
+        results: List[Optional[Tuple[float, float, Optional[str]]]] = [None] * len(items)
+        pending = []
+        for idx, (question_text, expected_answer, student_answer, points) in enumerate(items):
+            if not student_answer or not student_answer.strip():
+                results[idx] = (0.0, points, "No answer provided.")
+                continue
+            cached = self._cache_get(self._cache_key(question_text, expected_answer, student_answer, points))
+            if cached is not None:
+                results[idx] = (cached[0], points, cached[1])
+            else:
+                pending.append(idx)
+        
+        if len(pending) > 1:
+            try:
+                graded = self._request_text_batch([items[idx] for idx in pending])
+            except Exception as e:
+                print(f"Gemini batch grading failed: {e}. Falling back to per-answer requests.")
+            else:
+                for idx, (score, feedback) in zip(pending, graded):
+                    self._cache_set(self._cache_key(*items[idx]), (score, feedback))
+                    results[idx] = (score, items[idx][3], feedback)
+                pending = []
+        
+        if pending:
+            for idx, result in zip(pending, self._grade_text_concurrently([items[idx] for idx in pending])):
+                results[idx] = result
+        
+        return results
+    
+    def _request_text_batch(self, items: List[Tuple[str, Any, str, float]]) -> List[Tuple[float, str]]:
+        """Grade several answers in one Gemini request; returns (score, feedback) per item."""
+        response = self.model.generate_content(
+            self._build_batch_grading_prompt(items),
+            generation_config={
+                **self.GENERATION_CONFIG,
+                "max_output_tokens": min(
+                    self.GENERATION_CONFIG["max_output_tokens"] * len(items), self.MAX_OUTPUT_TOKENS
+                ),
+                "response_mime_type": "application/json",
+                "response_schema": list[_BatchGrade],
+            },
+            # a stuck request raises here and grade_text_batch falls back to per-answer grading
+            request_options={"timeout": self.BATCH_TIMEOUT},
+        )
+        
+        graded = {int(entry["id"]): entry for entry in json.loads(response.text)}
+        results = []
+        for number, (_, _, _, points) in enumerate(items, start=1):
+            entry = graded[number]
+            score = max(0.0, min(float(entry["score"]), points))
+            results.append((round(score, 4), str(entry.get("feedback", "")).strip()))
+        return results
+    
+    def _grade_text_concurrently(self, items: List[Tuple[str, Any, str, float]]) -> List[Tuple[float, float, Optional[str]]]:
+        """Grade text answers with one Gemini request each, at most MAX_CONCURRENCY in flight."""
+        if len(items) < 2:
+            return super().grade_text_batch(items)
+        
+        async def run_all():
+            semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+            
+            async def run_one(item):
+                async with semaphore:
+                    return await self.grade_text_async(*item)
+            
+            return await asyncio.gather(*(run_one(item) for item in items))
+        
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            future = asyncio.run_coroutine_threadsafe(run_all(), self._event_loop())
+            try:
+                return list(future.result(timeout=self.BATCH_TIMEOUT))
+            except concurrent.futures.TimeoutError:
+                future.cancel()
+                print(f"Gemini grading timed out after {self.BATCH_TIMEOUT}s. Falling back to keyword matching.")
+                return MockGrader().grade_text_batch(items)
+        # already inside an event loop (e.g. called from async code): grade sequentially
+        return super().grade_text_batch(items)
+    
+    def _event_loop(self) -> asyncio.AbstractEventLoop:
+        """
+        Return the grader's background event loop, starting it on first use.
+        
+        The async Gemini client binds to the loop it is first used on, so every
+        batch runs on this one long-lived loop instead of a fresh asyncio.run().
+        """
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(target=self._loop.run_forever, name="gemini-grader", daemon=True).start()
+            return self._loop
+    
+    @staticmethod
+    def _cache_key(question: str, expected: Any, student: str, points: float) -> str:
+        """Content hash identifying one grading request."""
+        raw = f"{question}|{expected}|{student}|{points}".encode()
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
+    
+    def _cache_get(self, key: str) -> Optional[Tuple[float, str]]:
+        """Return a cached (score, feedback) pair, marking it recently used."""
+        with self._cache_lock:
+            value = self._cache.get(key)
+            if value is not None:
+                self._cache.move_to_end(key)
+            return value
+    
+    def _cache_set(self, key: str, value: Tuple[float, str]) -> None:
+        """Store a (score, feedback) pair, evicting the least recently used entry."""
+        with self._cache_lock:
+            self._cache[key] = value
+            self._cache.move_to_end(key)
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+    
     def _build_grading_prompt(self, question: str, expected: Any, student: str, points: float) -> str:
         """Build the grading prompt for Gemini."""
         return f"""Grade the following student answer on a scale of 0 to {points} points.
@@ -144,26 +378,43 @@ class GeminiGrader(BaseGrader):
 
             Be fair and thorough. Award partial credit for partially correct answers."""
     
+    def _build_batch_grading_prompt(self, items: List[Tuple[str, Any, str, float]]) -> str:
+        """Build a single grading prompt covering several numbered answers."""
+        sections = "\n".join(
+            f"""
+            ANSWER {number} (scale 0 to {points} points)
+            QUESTION:
+            {question}
+
+            EXPECTED ANSWER / RUBRIC:
+            {expected}
+
+            STUDENT ANSWER:
+            {student}
+            """
+            for number, (question, expected, student, points) in enumerate(items, start=1)
+        )
+        return f"""Grade each of the following {len(items)} student answers on its own scale.
+            {sections}
+            Reply with a JSON array containing one object per answer:
+            {{"id": <answer number>, "score": <number within that answer's scale>, "feedback": "<constructive feedback explaining the grade>"}}
+
+            Be fair and thorough. Award partial credit for partially correct answers."""
+    
     def _parse_llm_response(self, response: str, max_points: float) -> Tuple[float, str]:
         """Parse Gemini response to extract score and feedback."""
-        lines = response.strip().split('\n')
         score = 0.0
         feedback = response
         
-        for line in lines:
-            if line.startswith("SCORE:"):
+        # the FEEDBACK alternative consumes the rest of the text, so the scan ends there
+        for match in _LLM_RESPONSE_RE.finditer(response.strip()):
+            if match.group("score") is not None:
                 try:
-                    score_text = line.replace("SCORE:", "").strip()
-                    score = float(score_text)
-                    score = max(0.0, min(score, max_points))
+                    score = max(0.0, min(float(match.group("score")), max_points))
                 except ValueError:
                     pass
-            elif line.startswith("FEEDBACK:"):
-                feedback = line.replace("FEEDBACK:", "").strip()
-                idx = lines.index(line)
-                if idx + 1 < len(lines):
-                    feedback = '\n'.join(lines[idx:]).replace("FEEDBACK:", "").strip()
-                break
+            else:
+                feedback = match.group("feedback").strip()
         
         return round(score, 4), feedback
 
@@ -208,25 +459,9 @@ def grade_question(question, answer_obj, grader: Optional[BaseGrader] = None) ->
     if grader is None:
         grader = MockGrader()
     
-    qtype = question.question_type
-    question_text = getattr(question, "question_text", "")
-    
-    if qtype == "mcq":
-        expected = question.expected_answer
-        selected = getattr(answer_obj, "selected_choice", None) or getattr(answer_obj, "answer_text", None)
-        
-        # Normalize expected answer
-        if isinstance(expected, dict) and "key" in expected:
-            expected_key = expected.get("key")
-        else:
-            expected_key = expected
-        
-        awarded, possible, feedback = grader.grade_mcq(expected_key, selected, question.points)
-    else:
-        # Text question
-        expected = question.expected_answer
-        student_answer = getattr(answer_obj, "answer_text", "")
-        awarded, possible, feedback = grader.grade_text(question_text, expected, student_answer, question.points)
+    # unknown question types are graded as text, as before
+    handler = _QUESTION_HANDLERS.get(question.question_type, _grade_text_question)
+    awarded, possible, feedback = handler(question, answer_obj, grader)
     
     return {
         "points_awarded": awarded,
@@ -234,8 +469,122 @@ def grade_question(question, answer_obj, grader: Optional[BaseGrader] = None) ->
         "feedback": feedback
     }
 
+def _grade_mcq_question(question, answer_obj, grader: BaseGrader) -> Tuple[float, float, Optional[str]]:
+    """Grade one MCQ answer."""
+    selected = getattr(answer_obj, "selected_choice", None) or getattr(answer_obj, "answer_text", None)
+    return grader.grade_mcq(_mcq_expected_key(question), selected, question.points)
+
+def _grade_text_question(question, answer_obj, grader: BaseGrader) -> Tuple[float, float, Optional[str]]:
+    """Grade one text answer."""
+    return grader.grade_text(
+        question.text,
+        question.expected_answer,
+        getattr(answer_obj, "answer_text", ""),
+        question.points,
+    )
+
+# grade_question dispatch table keyed by Question.question_type
+_QUESTION_HANDLERS: Dict[str, Callable[[Any, Any, BaseGrader], Tuple[float, float, Optional[str]]]] = {
+    "mcq": _grade_mcq_question,
+    "text": _grade_text_question,
+}
+
+def grade_mcq_batch(pairs, grader: Optional[BaseGrader] = None) -> List[Dict[str, Any]]:
+    """
+    Grade a list of (question, answer_obj) MCQ pairs in one batch.
+    
+    Args:
+        pairs: List of (Question instance, Answer object) tuples, all MCQ
+        grader: Grader instance (defaults to MockGrader)
+    
+    Returns:
+        List of dicts in the same shape as grade_question, one per pair
+    """
+    if grader is None:
+        grader = MockGrader()
+    
+    expected_keys, selected_keys, points = [], [], []
+    for question, answer_obj in pairs:
+        expected_keys.append(_mcq_expected_key(question))
+        selected_keys.append(getattr(answer_obj, "selected_choice", None) or getattr(answer_obj, "answer_text", None))
+        points.append(question.points)
+    
+    return [
+        {"points_awarded": awarded, "points_possible": possible, "feedback": feedback}
+        for awarded, possible, feedback in grader.grade_mcq_batch(expected_keys, selected_keys, points)
+    ]
+
+def grade_text_batch(pairs, grader: Optional[BaseGrader] = None) -> List[Dict[str, Any]]:
+    """
+    Grade a list of (question, answer_obj) text pairs in one batch.
+    
+    Args:
+        pairs: List of (Question instance, Answer object) tuples, all text questions
+        grader: Grader instance (defaults to MockGrader)
+    
+    Returns:
+        List of dicts in the same shape as grade_question, one per pair
+    """
+    if grader is None:
+        grader = MockGrader()
+    
+    items = [
+        (
+            question.text,
+            question.expected_answer,
+            getattr(answer_obj, "answer_text", ""),
+            question.points,
+        )
+        for question, answer_obj in pairs
+    ]
+    
+    return [
+        {"points_awarded": awarded, "points_possible": possible, "feedback": feedback}
+        for awarded, possible, feedback in grader.grade_text_batch(items)
+    ]
+
+def grade_batch(pairs, grader: Optional[BaseGrader] = None) -> List[Dict[str, Any]]:
+    """
+    Grade a submission's (question, answer_obj) pairs of any question type in one call.
+    
+    MCQ pairs are scored locally in a single pass; text pairs go to the grader as one
+    batch, so LLM graders can answer them with one request.
+    
+    Args:
+        pairs: List of (Question instance, Answer object) tuples
+        grader: Grader instance (defaults to MockGrader)
+    
+    Returns:
+        List of dicts in the same shape as grade_question, in the order of pairs
+    """
+    if grader is None:
+        grader = MockGrader()
+    
+    mcq_idx = [idx for idx, (question, _) in enumerate(pairs) if question.question_type == "mcq"]
+    text_idx = [idx for idx, (question, _) in enumerate(pairs) if question.question_type != "mcq"]
+    
+    results: List[Optional[Dict[str, Any]]] = [None] * len(pairs)
+    for idx, result in zip(mcq_idx, grade_mcq_batch([pairs[idx] for idx in mcq_idx], grader)):
+        results[idx] = result
+    for idx, result in zip(text_idx, grade_text_batch([pairs[idx] for idx in text_idx], grader)):
+        results[idx] = result
+    return results
+
+def _mcq_expected_key(question) -> Any:
+    """Expected MCQ key as stored ("A" or {"key": "A"}); graders normalize it when comparing."""
+    expected = question.expected_answer
+    if isinstance(expected, dict) and "key" in expected:
+        return expected.get("key")
+    return expected
+
+@lru_cache(maxsize=1)
 def get_default_grader() -> BaseGrader:
-    """Get the default grader from environment settings."""
+    """
+    Get the default grader from environment settings.
+    
+    The grader is built once per process so its model client, connection pool
+    and result cache are reused across requests.
+    """
     strategy = os.getenv("GRADING_STRATEGY", "mock").lower()
     
     try:
@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-15 09:30
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assessments", "0002_alter_submission_unique_together"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name="submission",
+            unique_together=set(),
+        ),
+        migrations.AddConstraint(
+            model_name="submission",
+            constraint=models.UniqueConstraint(
+                fields=("student", "exam"), name="uniq_student_exam_submission"
+            ),
+        ),
+    ]
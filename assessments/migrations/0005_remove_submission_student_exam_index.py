@@ -0,0 +1,17 @@
+# Generated by Django 6.0 on 2026-10-15 10:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("assessments", "0004_submission_unique_constraint"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="submission",
+            name="assessments_student_10b0e6_idx",
+        ),
+    ]
@@ -1,3 +1,5 @@
+from functools import cached_property
+
 from django.db import models
 from django.contrib.auth import get_user_model
 from django.utils import timezone
@@ -39,6 +41,31 @@ class Question(models.Model):
     def __str__(self):
         return f"Q{self.id}: {self.text[:60]}"
 
+    @cached_property
+    def choice_keys(self):
+        """Set of valid choice keys, normalized from `choices` once per instance."""
+        choices_field = self.choices
+        if not choices_field:
+            return frozenset()
+        if not isinstance(choices_field, (list, tuple)):
+            return frozenset(c.strip() for c in str(choices_field).split(",") if c.strip())
+
+        keys = set()
+        for c in choices_field:
+            if isinstance(c, dict):
+                k = c.get("key") or c.get("id") or c.get("value")
+                if k is None:
+                    # fallback to text or stringify
+                    k = c.get("text") if isinstance(c.get("text"), str) else str(c)
+            else:
+                s = str(c)
+                if ":" in s:
+                    k = s.split(":", 1)[0].strip()
+                else:
+                    k = s.strip()
+            keys.add(str(k))
+        return frozenset(keys)
+
 
 class Submission(models.Model):
     student = models.ForeignKey(User, on_delete=models.CASCADE, related_name="submissions")
@@ -49,9 +76,11 @@ class Submission(models.Model):
     grade = models.FloatField(null=True, blank=True)
 
     class Meta:
-        indexes = [models.Index(fields=["student", "exam"]) ]
-       
-        unique_together = ("student", "exam")
+        # the unique constraint's index serves (student, exam) lookups and
+        # student-only filters (leading column); no separate Index needed
+        constraints = [
+            models.UniqueConstraint(fields=["student", "exam"], name="uniq_student_exam_submission"),
+        ]
 
     def __str__(self):
         return f"Submission {self.id} by {self.student} for {self.exam}"
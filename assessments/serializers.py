@@ -1,11 +1,14 @@
 from rest_framework import serializers
+from assessment_engine.serializers import CachedFieldsMixin
+
 from .models import Exam, Question, Submission, Answer
 
 
 class QuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Question
-        fields = ("__all__")
+        # listed explicitly: QuestionViewSet/ExamViewSet list these columns with .values()
+        fields = ("id", "text", "question_type", "choices", "expected_answer", "points", "order", "exam")
 
 
 class ExamSerializer(serializers.ModelSerializer):
@@ -31,7 +34,7 @@ class SubmissionCreateSerializer(serializers.Serializer):
         answers = data.get("answers", [])
 
         try:
-            exam = Exam.objects.get(pk=exam_id)
+            exam = Exam.objects.prefetch_related("questions").get(pk=exam_id)
         except Exam.DoesNotExist:
             raise serializers.ValidationError({"exam": "Exam does not exist."})
 
@@ -46,71 +49,37 @@ class SubmissionCreateSerializer(serializers.Serializer):
             raise serializers.ValidationError({"answers": "Duplicate question references in answers are not allowed."})
 
         # fetch all questions for this exam to validate membership and allow order-based referencing
-        all_qs = list(Question.objects.filter(exam=exam).order_by("order", "id"))
+        all_qs = list(exam.questions.all())
         if not all_qs:
             raise serializers.ValidationError({"exam": "Exam has no questions."})
 
-        # build id and order maps
-        id_map = {q.id: q for q in all_qs}
+        # build the order map in a single pass; questions without an order fall back to their position
         order_map = {}
-        if any(getattr(q, "order", None) is not None for q in all_qs):
-            for q in all_qs:
-                try:
-                    order_map[int(q.order)] = q
-                except Exception:
-                    continue
-        else:
-            for idx, q in enumerate(all_qs, start=1):
-                order_map[idx] = q
+        for position, q in enumerate(all_qs, start=1):
+            order_map[q.order if q.order is not None else position] = q
 
         # per-answer validation
         resolved_map = {}
         for idx, ans in enumerate(answers):
+            # the reference is already an int (IntegerField) holding the question's order index
             qref = ans.get("question")
-            question = None
-
-            # try to interpret the provided reference as an int (either id or order)
-            try:
-                qnum = int(qref)
-            except Exception:
-                qnum = None
-
-            if qnum is not None and qnum in order_map:
-                question = order_map[qnum]
-                # normalize the answer to use the canonical question id
-                ans["question"] = question.id
-            else:
+            question = order_map.get(qref)
+
+            if question is None:
                 raise serializers.ValidationError({f"answers[{idx}]": f"Question reference '{qref}' is invalid for this exam. Provide its order index."})
+            # normalize the answer to use the canonical question id
+            ans["question"] = question.id
 
             # validate content depending on question type
             selected_choice = ans.get("selected_choice", "")
             answer_text = ans.get("answer_text", "")
 
-            choices_field = getattr(question, "choices", None)
-            if choices_field:
-                # normalize choices into keys
-                keys = []
-                if isinstance(choices_field, (list, tuple)):
-                    for c in choices_field:
-                        if isinstance(c, dict):
-                            k = c.get("key") or c.get("id") or c.get("value")
-                            if k is None:
-                                # fallback to text or stringify
-                                k = c.get("text") if isinstance(c.get("text"), str) else str(c)
-                        else:
-                            s = str(c)
-                            if ":" in s:
-                                k = s.split(":", 1)[0].strip()
-                            else:
-                                k = s.strip()
-                        keys.append(str(k))
-                else:
-                    keys = [c.strip() for c in str(choices_field).split(",") if c.strip()]
-
+            if question.choices:
+                keys = question.choice_keys
                 if not selected_choice:
                     raise serializers.ValidationError({f"answers[{idx}]": "selected_choice is required for choice questions."})
                 if str(selected_choice) not in keys:
-                    raise serializers.ValidationError({f"answers[{idx}]": f"selected_choice '{selected_choice}' is not valid for question {question.id}. choices: {keys}"})
+                    raise serializers.ValidationError({f"answers[{idx}]": f"selected_choice '{selected_choice}' is not valid for question {question.id}. choices: {sorted(keys)}"})
             else:
                 if not answer_text:
                     raise serializers.ValidationError({f"answers[{idx}]": "answer_text is required for open-ended questions."})
@@ -132,7 +101,7 @@ class AnswerSerializer(serializers.ModelSerializer):
         fields = ("id", "question", "answer_text", "selected_choice", "points_awarded")
 
 
-class SubmissionSerializer(serializers.ModelSerializer):
+class SubmissionSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     answers = AnswerSerializer(many=True, read_only=True)
     student = serializers.StringRelatedField()
     exam = ExamSerializer(read_only=True)
@@ -140,3 +109,21 @@ class SubmissionSerializer(serializers.ModelSerializer):
     class Meta:
         model = Submission
         fields = ("id", "student", "exam", "started_at", "submitted_at", "graded", "grade", "answers")
+
+
+class SubmissionResultSerializer(SubmissionSerializer):
+    """
+    Renders a just-created submission from the Answer instances passed in context["answers"],
+    adding the grader's per-answer feedback from context["feedback"] (keyed by question id).
+    """
+
+    answers = serializers.SerializerMethodField()
+
+    def get_answers(self, obj):
+        answers = self.context["answers"]
+        feedback_map = self.context.get("feedback", {})
+        data = AnswerSerializer(answers, many=True).data
+        for answer, item in zip(answers, data):
+            if answer.question_id in feedback_map:
+                item["feedback"] = feedback_map[answer.question_id]
+        return data
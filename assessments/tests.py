@@ -0,0 +1,22 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+class InvalidTokenTests(APITestCase):
+    """A bad token on a public read is rejected cleanly, whichever renderer is asked for."""
+
+    URLS = ("/api/exams/", "/api/questions/")
+
+    def test_invalid_token_html_get_returns_401(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+        for url in self.URLS:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_ACCEPT="text/html")
+                self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token_json_get_returns_401(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+        for url in self.URLS:
+            with self.subTest(url=url):
+                response = self.client.get(url, HTTP_ACCEPT="application/json")
+                self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -1,26 +1,42 @@
+import math
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.pagination import CursorPagination
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, SAFE_METHODS, BasePermission
-from django.shortcuts import get_object_or_404
+from django.db import IntegrityError, transaction
+from django.db.models import Prefetch
+from django.utils import timezone
 
 from .models import Exam, Submission, Question, Answer
 from .serializers import (
     ExamSerializer,
     SubmissionSerializer,
     SubmissionCreateSerializer,
+    SubmissionResultSerializer,
     QuestionSerializer,
 )
 from . import grader
 
+# grader configured from the environment, built once when the module is imported;
+# graders are shared across request threads (GeminiGrader guards its cache and event loop)
+GRADER = grader.get_default_grader()
+
 
 class IsAdminOrReadOnly(BasePermission):
     """Allow safe methods for anyone, restrict unsafe methods to admin users."""
 
     def has_permission(self, request, view):
-        if request.method in SAFE_METHODS:
-            return True
-        return bool(request.user and request.user.is_authenticated and request.user.is_staff)
+        # AnonymousUser.is_staff is False, so no separate is_authenticated check is needed
+        return request.method in SAFE_METHODS or request.user.is_staff
+
+
+# Columns rendered by ExamSerializer / QuestionSerializer, in output order, taken from
+# the serializers themselves. The list actions read them with .values() and skip
+# per-instance serializer work; the exam's nested "questions" are attached separately.
+EXAM_LIST_FIELDS = tuple(f for f in ExamSerializer.Meta.fields if f != "questions")
+QUESTION_LIST_FIELDS = QuestionSerializer.Meta.fields
 
 
 class ExamViewSet(viewsets.ModelViewSet):
@@ -28,6 +44,20 @@ class ExamViewSet(viewsets.ModelViewSet):
     serializer_class = ExamSerializer
     permission_classes = [IsAdminOrReadOnly]
 
+    def list(self, request, *args, **kwargs):
+        # the questions prefetch is dropped: .values() rows are grouped with them below
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None)
+        exams = list(queryset.values(*EXAM_LIST_FIELDS))
+        questions_by_exam = {exam["id"]: [] for exam in exams}
+        for question in Question.objects.filter(exam_id__in=questions_by_exam).values(*QUESTION_LIST_FIELDS):
+            questions_by_exam[question["exam"]].append(question)
+        for exam in exams:
+            exam["questions"] = questions_by_exam[exam["id"]]
+        return Response(exams)
+
+
+DUPLICATE_SUBMISSION_DETAIL = "A submission for this exam already exists for this student."
+
 
 class IsOwnerOrStaff:
     """Simple permission check helper used in view methods."""
@@ -37,10 +67,27 @@ class IsOwnerOrStaff:
         return request.user.is_staff or obj.student_id == request.user.id
 
 
+class SubmissionCursorPagination(CursorPagination):
+    """Newest-first pages of submissions; each page is one keyset range query on the primary key."""
+
+    page_size = 50
+    ordering = "-id"
+
+
 class SubmissionViewSet(viewsets.ModelViewSet):
-    queryset = Submission.objects.all().prefetch_related("answers__question")
+    # student and exam are joined in; the exam's questions and the answers with
+    # their questions come back in one prefetch query each
+    queryset = (
+        Submission.objects.select_related("student", "exam")
+        .prefetch_related(
+            "exam__questions",
+            Prefetch("answers", queryset=Answer.objects.select_related("question")),
+        )
+        .all()
+    )
     serializer_class = SubmissionSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = SubmissionCursorPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -51,69 +98,79 @@ class SubmissionViewSet(viewsets.ModelViewSet):
     def create(self, request, *args, **kwargs):
         serializer = SubmissionCreateSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        exam_id = serializer.validated_data["exam"]
-        exam = get_object_or_404(Exam, pk=exam_id)
-        # create Submission and grade using configured grader
-        from django.db import transaction
-
-        grader_instance = grader.get_default_grader()
-
-        # prevent duplicate submissions for non-staff users
-        if not request.user.is_staff and Submission.objects.filter(student=request.user, exam=exam).exists():
-            return Response(
-                {"detail": "A submission for this exam already exists for this student."},
-                status=status.HTTP_400_BAD_REQUEST,
+        # validation already loaded the exam with its questions prefetched; the response's
+        # exam.questions reads that cache, so create() issues no exam or question query
+        exam = serializer.validated_data["exam_instance"]
+        # reject a repeat submission before paying for grading; the unique constraint
+        # below is only the backstop for two requests racing past this check
+        if Submission.objects.filter(student=request.user, exam=exam).exists():
+            return Response({"detail": DUPLICATE_SUBMISSION_DETAIL}, status=status.HTTP_400_BAD_REQUEST)
+        # build Answer objects and grade them all in one batch before touching the
+        # database, so no transaction is held open while the grader runs
+        question_map = serializer.validated_data["question_map"]
+        rows = []
+        for ans in serializer.validated_data["answers"]:
+            q = question_map[ans["question"]]
+            answer = Answer(
+                question=q,
+                answer_text=ans.get("answer_text"),
+                selected_choice=ans.get("selected_choice"),
             )
-
-        with transaction.atomic():
-            submission = Submission.objects.create(student=request.user, exam=exam)
-
-            total_awarded = 0.0
-            total_points = 0.0
-            feedback_map = {}
-
-            # create Answer objects and grade
-            question_map = serializer.validated_data.get("question_map", {})
-            for ans in serializer.validated_data["answers"]:
-                q = question_map.get(ans["question"]) or get_object_or_404(Question, pk=ans["question"])
-                answer = Answer.objects.create(
-                    submission=submission,
-                    question=q,
-                    answer_text=ans.get("answer_text"),
-                    selected_choice=ans.get("selected_choice"),
+            rows.append((q, answer))
+
+        feedback_map = {}
+        possible = []
+        results = grader.grade_batch(rows, grader=GRADER)
+        for (q, answer), result in zip(rows, results):
+            answer.points_awarded = result.get("points_awarded", 0.0)
+            possible.append(result.get("points_possible", 0.0))
+            feedback_map[q.id] = result.get("feedback")
+
+        # fsum sums the per-answer scores without accumulated rounding error
+        total_awarded = math.fsum(answer.points_awarded for _, answer in rows)
+        total_points = math.fsum(possible)
+        grade = round((total_awarded / total_points) * 100.0, 2) if total_points else 0.0
+        now = timezone.now()
+
+        # one transaction holding the finished submission's INSERT and the answers' bulk INSERT
+        try:
+            with transaction.atomic():
+                submission = Submission.objects.create(
+                    student=request.user,
+                    exam=exam,
+                    started_at=now,
+                    submitted_at=now,
+                    graded=True,
+                    grade=grade,
                 )
-
-                # grader.grade_question returns a dict with points_awarded, points_possible, feedback
-                result = grader.grade_question(q, answer, grader=grader_instance)
-                awarded = result.get("points_awarded", 0.0)
-                points = result.get("points_possible", 0.0)
-                fb = result.get("feedback")
-
-                answer.points_awarded = awarded
-                answer.save(update_fields=["points_awarded"])
-
-                total_awarded += awarded
-                total_points += points
-                feedback_map[answer.id] = fb
-
-            # finalize submission
-            submission.submitted_at = submission.started_at
-            submission.graded = True
-            submission.grade = round((total_awarded / total_points) * 100.0, 2) if total_points else 0.0
-            submission.save(update_fields=["submitted_at", "graded", "grade"])
-
-        # Prepare response and attach per-answer feedback (not persisted)
-        response_data = SubmissionSerializer(submission).data
-        for a in response_data.get("answers", []):
-            a_id = a.get("id")
-            if a_id in feedback_map:
-                a["feedback"] = feedback_map.get(a_id)
+                for _, answer in rows:
+                    answer.submission = submission
+
+                Answer.objects.bulk_create([answer for _, answer in rows])
+        except IntegrityError:
+            # only a violation of the (student, exam) unique constraint is a duplicate
+            # submission; any other integrity failure (e.g. a question deleted since
+            # validation) is re-raised
+            if not Submission.objects.filter(student=request.user, exam=exam).exists():
+                raise
+            return Response({"detail": DUPLICATE_SUBMISSION_DETAIL}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Prepare response from the in-memory answers with per-answer feedback (not persisted)
+        answers = [answer for _, answer in rows]
+        response_data = SubmissionResultSerializer(
+            submission, context={"answers": answers, "feedback": feedback_map}
+        ).data
 
         return Response(response_data, status=status.HTTP_201_CREATED)
 
 
 class QuestionViewSet(viewsets.ModelViewSet):
-    queryset = Question.objects.select_related("exam").all()
+    # QuestionSerializer renders exam as its primary key (exam_id), so no join is needed
+    queryset = Question.objects.all()
     serializer_class = QuestionSerializer
     permission_classes = [IsAdminOrReadOnly]
 
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(list(queryset.values(*QUESTION_LIST_FIELDS)))
+
@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-15 10:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        # auth.User's email is not unique at the model level; users without an email
+        # (createsuperuser allows a blank one) stay exempt from the index
+        migrations.RunSQL(
+            sql="CREATE UNIQUE INDEX users_auth_user_email_uniq ON auth_user (email) WHERE email <> ''",
+            reverse_sql="DROP INDEX users_auth_user_email_uniq",
+        ),
+    ]
@@ -1,12 +1,22 @@
+from contextlib import contextmanager
+
 from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
 from rest_framework import serializers
-from rest_framework.validators import UniqueValidator
-from rest_framework.authtoken.models import Token
+
+from assessment_engine.serializers import CachedFieldsMixin
+
+
+# unique index created by users/migrations/0001_auth_user_email_unique.py; Postgres names
+# it in the error, SQLite reports the column as "auth_user.email"
+EMAIL_INDEX_NAME = "users_auth_user_email_uniq"
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(CachedFieldsMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True)
-    email = serializers.EmailField(required=True, validators=[UniqueValidator(queryset=User.objects.all())])
+    # uniqueness is enforced by the users_auth_user_email_uniq index (see users/migrations);
+    # a clash surfaces as an IntegrityError from the write instead of a SELECT beforehand
+    email = serializers.EmailField(required=True)
     token = serializers.SerializerMethodField(read_only=True)
 
     class Meta:
@@ -27,28 +37,39 @@ class UserSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         password = validated_data.pop("password", None)
-        user = super().create(validated_data)
+        # hash the password before the INSERT so the user is saved (and post_save,
+        # which creates the token, fires) exactly once
+        user = User(**validated_data)
         if password:
             user.set_password(password)
+        with self._unique_email():
             user.save()
-        try:
-            Token.objects.get_or_create(user=user)
-        except Exception:
-            pass
         return user
 
     def update(self, instance, validated_data):
         password = validated_data.pop("password", None)
-        user = super().update(instance, validated_data)
+        with self._unique_email():
+            user = super().update(instance, validated_data)
         if password:
             user.set_password(password)
             user.save()
         return user
 
-    def get_token(self, obj):
-        # return the token key for this user (create if missing)
+    @contextmanager
+    def _unique_email(self):
+        """Run a user write in a savepoint, reporting an email clash as a field error."""
         try:
-            token, _ = Token.objects.get_or_create(user=obj)
-            return token.key
-        except Exception:
-            return None
+            with transaction.atomic():
+                yield
+        except IntegrityError as exc:
+            # match the violated index, not the bare word "email": a Postgres DETAIL line
+            # echoes the clashing value, which may itself contain "email"
+            message = str(exc)
+            if EMAIL_INDEX_NAME not in message and "auth_user.email" not in message:
+                raise
+            raise serializers.ValidationError({"email": ["This field must be unique."]})
+
+    def get_token(self, obj):
+        # return the token key for this user; tokens are created by the post_save signal
+        # and UserViewSet joins them in with select_related("auth_token")
+        return getattr(getattr(obj, "auth_token", None), "key", None)
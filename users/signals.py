@@ -18,4 +18,5 @@ def create_auth_token(sender, instance=None, created=False, **kwargs):
         return
     if Token is None:
         return
-    Token.objects.get_or_create(user=instance)
+    # created=True means the user row is brand new, so it cannot have a token yet
+    Token.objects.create(user=instance)
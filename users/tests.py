@@ -0,0 +1,18 @@
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+class InvalidTokenTests(APITestCase):
+    """A bad token on the public user list is rejected cleanly, whichever renderer is asked for."""
+
+    URL = "/api/users/"
+
+    def test_invalid_token_html_get_returns_401(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+        response = self.client.get(self.URL, HTTP_ACCEPT="text/html")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token_json_get_returns_401(self):
+        self.client.credentials(HTTP_AUTHORIZATION="Token invalid")
+        response = self.client.get(self.URL, HTTP_ACCEPT="application/json")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
@@ -7,14 +7,13 @@ class IsAdminOrReadOnly(permissions.BasePermission):
     """Allow write actions only to staff users, read-only for others."""
 
     def has_permission(self, request, view):
-        if request.method in permissions.SAFE_METHODS:
-            return True
-        return bool(request.user and request.user.is_authenticated and request.user.is_staff)
+        # AnonymousUser.is_staff is False, so no separate is_authenticated check is needed
+        return request.method in permissions.SAFE_METHODS or request.user.is_staff
 
 
 class UserViewSet(viewsets.ModelViewSet):
     """A simple ViewSet for viewing and editing users."""
 
-    queryset = User.objects.all().order_by("id")
+    queryset = User.objects.select_related("auth_token").order_by("id")
     serializer_class = UserSerializer
     permission_classes = [IsAdminOrReadOnly]